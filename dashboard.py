@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # Headless backend - must be set before pyplot is imported
+from matplotlib.figure import Figure
+
+BASE_TEMP = 14.0  # Global average temperature (°C)
 
 # Page configuration - MUST be first command
 st.set_page_config(
@@ -16,33 +20,110 @@ st.markdown("### University Final Year Project - Final Year Presentation")
 st.markdown("---")
 
 # Create sample climate data
-@st.cache_data
+@st.cache_data(ttl=None, max_entries=1)
 def create_climate_data():
     # Temperature data (2000-2023)
-    years = np.arange(2000, 2024)
-    np.random.seed(42)
+    years = np.arange(2000, 2024, dtype=np.int16)
+    rng = np.random.default_rng(42)
     
     # Realistic temperature trend
-    base_temp = 14.0
     warming_trend = 0.03 * (years - 2000)  # 0.3°C per decade
-    noise = np.random.normal(0, 0.1, len(years))
-    temperatures = base_temp + warming_trend + noise
+    noise = rng.standard_normal(len(years)) * 0.1
+    temperatures = (BASE_TEMP + warming_trend + noise).astype(np.float32)
     
     # CO2 data
     co2_base = 370
     co2_trend = 2 * (years - 2000)  # 2 ppm per year increase
-    co2_noise = np.random.normal(0, 1, len(years))
-    co2_levels = co2_base + co2_trend + co2_noise
+    co2_noise = rng.standard_normal(len(years))
+    co2_levels = (co2_base + co2_trend + co2_noise).astype(np.float32)
     
-    return pd.DataFrame({
+    climate_data = pd.DataFrame({
         'Year': years,
         'Temperature': temperatures,
-        'CO2': co2_levels,
-        'Anomaly': temperatures - base_temp
+        'CO2': co2_levels
     })
+    
+    # Summary scalars, correlation and trend line are fixed for this data,
+    # so compute them once here and cache them with it
+    x = co2_levels.astype(np.float64)
+    y = temperatures.astype(np.float64)
+    xc = x - x.mean()
+    slope = (xc * (y - y.mean())).sum() / (xc * xc).sum()
+    stats = {
+        'last_anomaly': float(temperatures[-1] - BASE_TEMP),
+        'first_co2': float(co2_levels[0]),
+        'last_co2': float(co2_levels[-1]),
+        'corr': float(np.corrcoef(x, y)[0, 1]),
+        'slope': float(slope),
+        'intercept': float(y.mean() - slope * x.mean()),
+    }
+    stats['co2_increase'] = stats['last_co2'] - stats['first_co2']
+    
+    # Warmest and coolest years, one argmax/argmin over the raw array each
+    imax = int(temperatures.argmax())
+    imin = int(temperatures.argmin())
+    stats['warmest_year'] = int(years[imax])
+    stats['warmest_temp'] = float(temperatures[imax])
+    stats['coolest_year'] = int(years[imin])
+    stats['coolest_temp'] = float(temperatures[imin])
+    
+    return climate_data, stats
+
+# Hash DataFrames by their raw bytes instead of letting Streamlit walk them
+_figure_cache = st.cache_data(
+    hash_funcs={pd.DataFrame: lambda df: (len(df), df.values.tobytes())}
+)
+
+# Cached figure builders - only re-render when the data changes. They build
+# plain Figures rather than pyplot ones: st.cache_data unpickles a copy on every
+# hit, and unpickled pyplot figures re-register with pyplot and are never closed.
+@_figure_cache
+def make_temperature_figure(climate_data):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    ax.plot(climate_data['Year'], climate_data['Temperature'], 
+            color='red', linewidth=3, marker='o', markersize=4)
+    ax.set_xlabel('Year', fontsize=12)
+    ax.set_ylabel('Temperature (°C)', fontsize=12)
+    ax.set_title('Global Average Temperature (2000-2023)', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.fill_between(climate_data['Year'], climate_data['Temperature'], 
+                   climate_data['Temperature'].min(), alpha=0.2, color='red')
+    return fig
+
+@_figure_cache
+def make_co2_figure(climate_data):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    ax.plot(climate_data['Year'], climate_data['CO2'], 
+            color='green', linewidth=3, marker='s', markersize=4)
+    ax.set_xlabel('Year', fontsize=12)
+    ax.set_ylabel('CO2 (parts per million)', fontsize=12)
+    ax.set_title('Atmospheric CO2 Levels (2000-2023)', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.fill_between(climate_data['Year'], climate_data['CO2'], 
+                   climate_data['CO2'].min(), alpha=0.2, color='green')
+    return fig
+
+@_figure_cache
+def make_correlation_figure(climate_data, slope, intercept):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    scatter = ax.scatter(climate_data['CO2'], climate_data['Temperature'], 
+                       c=climate_data['Year'], cmap='viridis', s=60, alpha=0.7)
+    ax.set_xlabel('CO2 Concentration (ppm)', fontsize=12)
+    ax.set_ylabel('Temperature (°C)', fontsize=12)
+    ax.set_title('Temperature vs CO2 Correlation', fontsize=14, fontweight='bold')
+    fig.colorbar(scatter, ax=ax, label='Year')
+    ax.grid(True, alpha=0.3)
+    
+    # Add trend line (closed-form least squares from create_climate_data)
+    x = climate_data['CO2'].values
+    ax.plot(x, slope * x + intercept, "r--", alpha=0.8)
+    return fig
 
 # Load data
-climate_data = create_climate_data()
+climate_data, stats = create_climate_data()
 
 # Display key metrics
 st.header("📊 Key Climate Indicators")
@@ -50,7 +131,7 @@ st.header("📊 Key Climate Indicators")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_warming = climate_data['Anomaly'].iloc[-1]
+    total_warming = stats['last_anomaly']
     st.metric(
         label="Total Warming (since 2000)",
         value=f"{total_warming:.2f}°C",
@@ -58,8 +139,8 @@ with col1:
     )
 
 with col2:
-    current_co2 = climate_data['CO2'].iloc[-1]
-    co2_increase = current_co2 - climate_data['CO2'].iloc[0]
+    current_co2 = stats['last_co2']
+    co2_increase = stats['co2_increase']
     st.metric(
         label="Current CO2 Level",
         value=f"{current_co2:.1f} ppm",
@@ -89,41 +170,21 @@ tab1, tab2, tab3, tab4 = st.tabs(["🌡️ Temperature", "🌫️ CO2", "🔗 Co
 with tab1:
     st.subheader("Global Temperature Trends")
     
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(climate_data['Year'], climate_data['Temperature'], 
-            color='red', linewidth=3, marker='o', markersize=4)
-    ax.set_xlabel('Year', fontsize=12)
-    ax.set_ylabel('Temperature (°C)', fontsize=12)
-    ax.set_title('Global Average Temperature (2000-2023)', fontsize=14, fontweight='bold')
-    ax.grid(True, alpha=0.3)
-    ax.fill_between(climate_data['Year'], climate_data['Temperature'], 
-                   climate_data['Temperature'].min(), alpha=0.2, color='red')
-    
-    st.pyplot(fig)
+    st.pyplot(make_temperature_figure(climate_data))
     
     # Temperature statistics
     col1, col2 = st.columns(2)
     with col1:
-        st.info(f"**Warmest Year:** {climate_data.loc[climate_data['Temperature'].idxmax(), 'Year']} "
-               f"({climate_data['Temperature'].max():.2f}°C)")
+        st.info(f"**Warmest Year:** {stats['warmest_year']} "
+               f"({stats['warmest_temp']:.2f}°C)")
     with col2:
-        st.info(f"**Coolest Year:** {climate_data.loc[climate_data['Temperature'].idxmin(), 'Year']} "
-               f"({climate_data['Temperature'].min():.2f}°C)")
+        st.info(f"**Coolest Year:** {stats['coolest_year']} "
+               f"({stats['coolest_temp']:.2f}°C)")
 
 with tab2:
     st.subheader("Atmospheric CO2 Concentrations")
     
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(climate_data['Year'], climate_data['CO2'], 
-            color='green', linewidth=3, marker='s', markersize=4)
-    ax.set_xlabel('Year', fontsize=12)
-    ax.set_ylabel('CO2 (parts per million)', fontsize=12)
-    ax.set_title('Atmospheric CO2 Levels (2000-2023)', fontsize=14, fontweight='bold')
-    ax.grid(True, alpha=0.3)
-    ax.fill_between(climate_data['Year'], climate_data['CO2'], 
-                   climate_data['CO2'].min(), alpha=0.2, color='green')
-    
-    st.pyplot(fig)
+    st.pyplot(make_co2_figure(climate_data))
     
     st.warning("💡 **Did you know?** CO2 levels have increased by over 45 ppm since 2000, "
               "contributing to global warming through the greenhouse effect.")
@@ -131,27 +192,13 @@ with tab2:
 with tab3:
     st.subheader("Temperature vs CO2 Correlation")
     
-    # Calculate correlation
-    correlation = climate_data['CO2'].corr(climate_data['Temperature'])
+    # Correlation is precomputed alongside the cached data
+    correlation = stats['corr']
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        fig, ax = plt.subplots(figsize=(10, 6))
-        scatter = ax.scatter(climate_data['CO2'], climate_data['Temperature'], 
-                           c=climate_data['Year'], cmap='viridis', s=60, alpha=0.7)
-        ax.set_xlabel('CO2 Concentration (ppm)', fontsize=12)
-        ax.set_ylabel('Temperature (°C)', fontsize=12)
-        ax.set_title('Temperature vs CO2 Correlation', fontsize=14, fontweight='bold')
-        plt.colorbar(scatter, ax=ax, label='Year')
-        ax.grid(True, alpha=0.3)
-        
-        # Add trend line
-        z = np.polyfit(climate_data['CO2'], climate_data['Temperature'], 1)
-        p = np.poly1d(z)
-        ax.plot(climate_data['CO2'], p(climate_data['CO2']), "r--", alpha=0.8)
-        
-        st.pyplot(fig)
+        st.pyplot(make_correlation_figure(climate_data, stats['slope'], stats['intercept']))
     
     with col2:
         st.metric("Correlation Coefficient", f"{correlation:.3f}")
@@ -166,8 +213,9 @@ with tab3:
 with tab4:
     st.subheader("Climate Data Overview")
     
-    # Show data table
-    st.dataframe(climate_data, use_container_width=True)
+    # Show data table - the anomaly column is derived for display, not stored
+    st.dataframe(climate_data.assign(Anomaly=climate_data['Temperature'] - BASE_TEMP),
+                 use_container_width=True)
     
     # Data statistics
     st.subheader("Data Statistics")
@@ -183,7 +231,7 @@ with tab4:
         st.write("**CO2 Statistics:**")
         st.write(f"- Average: {climate_data['CO2'].mean():.1f} ppm")
         st.write(f"- Standard Deviation: {climate_data['CO2'].std():.1f} ppm")
-        st.write(f"- Total Increase: {climate_data['CO2'].iloc[-1] - climate_data['CO2'].iloc[0]:.1f} ppm")
+        st.write(f"- Total Increase: {stats['co2_increase']:.1f} ppm")
 
 # Analysis Summary
 st.header("🔍 Key Findings")